@@ -1,9 +1,39 @@
 # app.py
 
+import functools
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-import plotly.graph_objects as go
+
+from data import (
+    load_property_data,
+    load_plot_data,
+    compute_prop_bounds,
+    compute_plot_bounds,
+    filter_prop_rows,
+    filter_plot_rows,
+    load_export_data,
+    hash_row_index,
+    FILTER_CACHE_ENTRIES
+)
+from charts import (
+    sum_by_category,
+    compute_kpis,
+    write_csv_bytes,
+    convert_prop_df,
+    render_download,
+    DENSITY_MAP_MIN_POINTS,
+    SCATTER_MAX_POINTS,
+    make_density_map,
+    sample_rows,
+    make_box_chart,
+    make_scatter_chart,
+    make_histogram,
+    make_summary_chart,
+    make_comparison_chart
+)
 
 # ---------------------------
 # Streamlit Page Configuration
@@ -37,16 +67,79 @@ dashboard = st.sidebar.radio("Select Dashboard:", ["Property Data Dashboard", "P
 # ---------------------------
 # Utility Functions
 # ---------------------------
-@st.cache_data
-def load_property_data(path):
-    return pd.read_csv(path)
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def summarize_prop_locations(df):
+    # Means are derived from the sums, so each column is reduced only once
+    summary = sum_by_category(
+        df,
+        'Standardized_Location_Name',
+        sums={
+            'Sum_Price': 'Plot__Price',
+            'Sum_Price_per_Cent': 'Price_per_cent',
+            'Sum_Build_Area': 'Build__Area',
+            'Sum_Plot_Area': 'Plot__Area'
+        },
+        counts={
+            'Total_Listings': 'Plot__Price',
+            'Listings_Price_per_Cent': 'Price_per_cent',
+            'Listings_Build_Area': 'Build__Area',
+            'Listings_Plot_Area': 'Plot__Area'
+        }
+    )
+    summary['Average_Price'] = summary['Sum_Price'] / summary['Total_Listings']
+    summary['Average_Price_per_Cent'] = summary['Sum_Price_per_Cent'] / summary['Listings_Price_per_Cent']
+    summary['Average_Build_Area'] = summary['Sum_Build_Area'] / summary['Listings_Build_Area']
+    summary['Average_Plot_Area'] = summary['Sum_Plot_Area'] / summary['Listings_Plot_Area']
+    return summary
+
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def summarize_plot_locations(df):
+    # Means are derived from the sums, so each column is reduced only once
+    summary = df.groupby('Location', observed=True, as_index=False).agg(
+        Sum_Price=('Price', 'sum'),
+        Sum_Price_per_Cent=('Price per cent', 'sum'),
+        Sum_Area=('Area', 'sum'),
+        Total_Plots=('Price', 'count'),
+        Plots_Price_per_Cent=('Price per cent', 'count'),
+        Plots_Area=('Area', 'count'),
+        Median_Area=('Area', 'median')
+    )
+    summary['Average_Price'] = summary['Sum_Price'] / summary['Total_Plots']
+    summary['Average_Price_per_Cent'] = summary['Sum_Price_per_Cent'] / summary['Plots_Price_per_Cent']
+    summary['Average_Area'] = summary['Sum_Area'] / summary['Plots_Area']
+    return summary
 
-@st.cache_data
-def load_plot_data(path):
-    return pd.read_csv(path)
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def convert_plot_df(path, df):
+    return write_csv_bytes(load_export_data(path).loc[df.index])
 
-def make_clickable(url):
-    return f'<a href="{url}" target="_blank">View Listing</a>'
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def make_plot_map(df):
+    # Marker map for the default view; returns the figure and the number of plots drawn
+    map_plot_data = sample_rows(df)
+    fig = px.scatter_mapbox(
+        map_plot_data,
+        lat="Latitude",
+        lon="Longitude",
+        hover_name="Location",
+        hover_data={
+            "Price": True,
+            "Area": True,
+            "Price per cent": True,
+            "distance_to_technopark": True,
+            "distance_to_nearest_beach": True
+        },
+        color="Price",
+        size="Area",
+        color_continuous_scale=px.colors.cyclical.IceFire,
+        size_max=15,
+        zoom=10,
+        height=600,
+        title="Geographical Distribution of Plots"
+    )
+    fig.update_layout(mapbox_style="open-street-map")
+    fig.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
+    return fig, len(map_plot_data)
 
 # ---------------------------
 # Property Data Dashboard
@@ -58,17 +151,16 @@ if dashboard == "Property Data Dashboard":
     # Load Property Dataset
     # ---------------------------
     property_file_path = 'Updated_Cleaned_Dataset (1).csv'  # Replace with your actual Property Data CSV file name
-    property_data = load_property_data(property_file_path)
-    
-    # ---------------------------
-    # Preprocessing: Check for Required Columns
-    # ---------------------------
     property_required_columns = [
         'Plot__url', 'Plot__Price', 'Plot__Beds', 'Build__Area', 'Plot__Area',
         'Plot__DESC', 'Plot__Area_Cents', 'Price_per_sqft', 'Price_per_cent',
         'Total_Area', 'Build_to_Plot_Ratio', 'Standardized_Location_Name'
     ]
+    property_data = load_property_data(property_file_path, property_required_columns)
     
+    # ---------------------------
+    # Preprocessing: Check for Required Columns
+    # ---------------------------
     missing_prop_columns = [col for col in property_required_columns if col not in property_data.columns]
     if missing_prop_columns:
         st.error(f"Property Data Dashboard - Missing required columns: {', '.join(missing_prop_columns)}")
@@ -78,95 +170,85 @@ if dashboard == "Property Data Dashboard":
     # Sidebar Filters for Property Dashboard
     # ---------------------------
     st.sidebar.header("🔍 Property Filters")
-    
-    # Multi-select Location Filter with Improved UX
-    prop_locations = sorted(property_data['Standardized_Location_Name'].unique())
-    selected_prop_locations = st.sidebar.multiselect(
-        "Select Location(s)",
-        options=prop_locations,
-        default=None  # No default selection
-    )
-    
-    # Handle 'Select All' functionality
-    if not selected_prop_locations:
-        filtered_prop_data = property_data.copy()
-    else:
-        filtered_prop_data = property_data[property_data['Standardized_Location_Name'].isin(selected_prop_locations)]
-    
-    # Multi-select Bedrooms Filter
-    prop_beds_options = sorted(property_data['Plot__Beds'].unique())
-    selected_prop_beds = st.sidebar.multiselect(
-        "Select Number of Bedrooms",
-        options=prop_beds_options,
-        default=prop_beds_options  # Select all by default
-    )
-    
-    if selected_prop_beds:
-        filtered_prop_data = filtered_prop_data[filtered_prop_data['Plot__Beds'].isin(selected_prop_beds)]
-    
-    # Price Range Slider
-    prop_min_price = int(property_data['Plot__Price'].min())
-    prop_max_price = int(property_data['Plot__Price'].max())
-    selected_prop_price = st.sidebar.slider(
-        "Select Price Range ($)",
-        min_value=prop_min_price,
-        max_value=prop_max_price,
-        value=(prop_min_price, prop_max_price),
-        step=10000
-    )
-    
-    filtered_prop_data = filtered_prop_data[
-        (filtered_prop_data['Plot__Price'] >= selected_prop_price[0]) &
-        (filtered_prop_data['Plot__Price'] <= selected_prop_price[1])
-    ]
-    
-    # Plot Area Range Slider
-    prop_min_plot_area = float(property_data['Plot__Area'].min())
-    prop_max_plot_area = float(property_data['Plot__Area'].max())
-    selected_prop_plot_area = st.sidebar.slider(
-        "Select Plot Area (sqft)",
-        min_value=prop_min_plot_area,
-        max_value=prop_max_plot_area,
-        value=(prop_min_plot_area, prop_max_plot_area),
-        step=1.0
-    )
-    
-    filtered_prop_data = filtered_prop_data[
-        (filtered_prop_data['Plot__Area'] >= selected_prop_plot_area[0]) &
-        (filtered_prop_data['Plot__Area'] <= selected_prop_plot_area[1])
-    ]
-    
-    # Build Area Range Slider
-    prop_min_build_area = float(property_data['Build__Area'].min())
-    prop_max_build_area = float(property_data['Build__Area'].max())
-    selected_prop_build_area = st.sidebar.slider(
-        "Select Build Area (sqft)",
-        min_value=prop_min_build_area,
-        max_value=prop_max_build_area,
-        value=(prop_min_build_area, prop_max_build_area),
-        step=1.0
-    )
-    
-    filtered_prop_data = filtered_prop_data[
-        (filtered_prop_data['Build__Area'] >= selected_prop_build_area[0]) &
-        (filtered_prop_data['Build__Area'] <= selected_prop_build_area[1])
-    ]
-    
-    # Build-to-Plot Ratio Slider
-    prop_min_ratio = float(property_data['Build_to_Plot_Ratio'].min())
-    prop_max_ratio = float(property_data['Build_to_Plot_Ratio'].max())
-    selected_prop_ratio = st.sidebar.slider(
-        "Select Build-to-Plot Ratio",
-        min_value=0.0,
-        max_value=round(prop_max_ratio, 2),
-        value=(0.0, round(prop_max_ratio, 2)),
-        step=0.1
+    prop_bounds = compute_prop_bounds(property_file_path, property_required_columns, 'Plot__Area')
+    
+    # Widgets in a form only rerun the dashboard when the filters are applied,
+    # not on every intermediate slider position
+    with st.sidebar.form("prop_filters"):
+        # Multi-select Location Filter with Improved UX
+        prop_locations = prop_bounds['locations']
+        selected_prop_locations = st.multiselect(
+            "Select Location(s)",
+            options=prop_locations,
+            default=None  # No default selection
+        )
+        
+        # Multi-select Bedrooms Filter
+        prop_beds_options = prop_bounds['beds']
+        selected_prop_beds = st.multiselect(
+            "Select Number of Bedrooms",
+            options=prop_beds_options,
+            default=prop_beds_options  # Select all by default
+        )
+        
+        # Price Range Slider
+        prop_min_price, prop_max_price = prop_bounds['price']
+        selected_prop_price = st.slider(
+            "Select Price Range ($)",
+            min_value=prop_min_price,
+            max_value=prop_max_price,
+            value=(prop_min_price, prop_max_price),
+            step=10000
+        )
+        
+        # Plot Area Range Slider
+        prop_min_plot_area, prop_max_plot_area = prop_bounds['plot_area']
+        selected_prop_plot_area = st.slider(
+            "Select Plot Area (sqft)",
+            min_value=prop_min_plot_area,
+            max_value=prop_max_plot_area,
+            value=(prop_min_plot_area, prop_max_plot_area),
+            step=1.0
+        )
+        
+        # Build Area Range Slider
+        prop_min_build_area, prop_max_build_area = prop_bounds['build_area']
+        selected_prop_build_area = st.slider(
+            "Select Build Area (sqft)",
+            min_value=prop_min_build_area,
+            max_value=prop_max_build_area,
+            value=(prop_min_build_area, prop_max_build_area),
+            step=1.0
+        )
+        
+        # Build-to-Plot Ratio Slider
+        prop_min_ratio, prop_max_ratio = prop_bounds['ratio']
+        selected_prop_ratio = st.slider(
+            "Select Build-to-Plot Ratio",
+            min_value=0.0,
+            max_value=round(prop_max_ratio, 2),
+            value=(0.0, round(prop_max_ratio, 2)),
+            step=0.1
+        )
+        
+        st.form_submit_button("Apply Filters")
+    
+    # Combine all predicates into a single mask and slice once
+    prop_mask = filter_prop_rows(
+        property_file_path,
+        property_required_columns,
+        ranges={
+            'Plot__Price': selected_prop_price,
+            'Plot__Area': selected_prop_plot_area,
+            'Build__Area': selected_prop_build_area,
+            'Build_to_Plot_Ratio': selected_prop_ratio
+        },
+        selections={
+            'Standardized_Location_Name': selected_prop_locations,
+            'Plot__Beds': selected_prop_beds
+        }
     )
-    
-    filtered_prop_data = filtered_prop_data[
-        (filtered_prop_data['Build_to_Plot_Ratio'] >= selected_prop_ratio[0]) &
-        (filtered_prop_data['Build_to_Plot_Ratio'] <= selected_prop_ratio[1])
-    ]
+    filtered_prop_data = property_data.iloc[np.flatnonzero(prop_mask)]
     
     # ---------------------------
     # Sidebar Summary for Property Dashboard
@@ -179,33 +261,28 @@ if dashboard == "Property Data Dashboard":
     # Key Performance Indicators (KPIs) for Property Dashboard
     # ---------------------------
     st.header("🚀 Key Performance Indicators")
+    prop_kpis = compute_kpis(filtered_prop_data, {
+        'Plot__Price': ['mean'],
+        'Plot__Area': ['median'],
+        'Price_per_sqft': ['mean']
+    })
     prop_kpi1, prop_kpi2, prop_kpi3, prop_kpi4 = st.columns(4)
     prop_kpi1.metric("Total Listings", len(filtered_prop_data))
-    prop_kpi2.metric("Average Price", f"${filtered_prop_data['Plot__Price'].mean():,.2f}")
-    prop_kpi3.metric("Median Plot Area", f"{filtered_prop_data['Plot__Area'].median():,.0f} sqft")
-    prop_kpi4.metric("Average Price per Sqft", f"${filtered_prop_data['Price_per_sqft'].mean():,.2f}")
+    prop_kpi2.metric("Average Price", f"${prop_kpis.at['mean', 'Plot__Price']:,.2f}")
+    prop_kpi3.metric("Median Plot Area", f"{prop_kpis.at['median', 'Plot__Area']:,.0f} sqft")
+    prop_kpi4.metric("Average Price per Sqft", f"${prop_kpis.at['mean', 'Price_per_sqft']:,.2f}")
     
     # ---------------------------
     # Overview of Major Locations for Property Dashboard
     # ---------------------------
     st.header("📊 Overview of Major Locations")
-    prop_location_summary = filtered_prop_data.groupby('Standardized_Location_Name').agg(
-        Average_Price=('Plot__Price', 'mean'),
-        Average_Price_per_Cent=('Price_per_cent', 'mean'),
-        Total_Listings=('Plot__Price', 'count'),
-        Average_Build_Area=('Build__Area', 'mean'),
-        Average_Plot_Area=('Plot__Area', 'mean')
-    ).reset_index()
-    
-    prop_summary_chart = px.bar(
+    prop_location_summary = summarize_prop_locations(filtered_prop_data)
+    
+    prop_summary_chart = make_summary_chart(
         prop_location_summary,
         x='Standardized_Location_Name',
-        y='Average_Price',
         hover_data=['Average_Price_per_Cent', 'Total_Listings', 'Average_Build_Area', 'Average_Plot_Area'],
-        labels={"Average_Price": "Average Price ($)"},
-        title="Average Price by Location",
-        color='Average_Price',
-        color_continuous_scale='Blues'
+        labels={"Average_Price": "Average Price ($)"}
     )
     st.plotly_chart(prop_summary_chart, use_container_width=True)
     
@@ -216,45 +293,37 @@ if dashboard == "Property Data Dashboard":
     
     # 1. Price Distribution by Location
     st.subheader("💲 Price Distribution by Location")
-    prop_fig_price_dist = px.box(
+    prop_fig_price_dist = make_box_chart(
         filtered_prop_data,
         x='Standardized_Location_Name',
         y='Plot__Price',
-        points='outliers',
         title="Price Distribution Across Locations",
-        labels={"Plot__Price": "Price ($)", "Standardized_Location_Name": "Location"},
-        color='Standardized_Location_Name',
-        color_discrete_sequence=px.colors.qualitative.Set3
+        labels={"Plot__Price": "Price ($)", "Standardized_Location_Name": "Location"}
     )
     st.plotly_chart(prop_fig_price_dist, use_container_width=True)
     
     # 2. Plot Area vs. Price with Regression Line
     st.subheader("📐 Plot Area vs. Price")
-    try:
-        prop_fig_scatter = px.scatter(
-            filtered_prop_data,
-            x='Plot__Area',
-            y='Plot__Price',
-            trendline='ols',
-            hover_data=['Price_per_sqft', 'Standardized_Location_Name'],
-            title="Relationship Between Plot Area and Price",
-            labels={"Plot__Area": "Plot Area (sqft)", "Plot__Price": "Price ($)"},
-            color='Standardized_Location_Name',
-            color_discrete_sequence=px.colors.qualitative.Safe
-        )
-        st.plotly_chart(prop_fig_scatter, use_container_width=True)
-    except ModuleNotFoundError:
-        st.warning("`statsmodels` is not installed. Install it to enable trendlines in scatter plots.")
+    prop_fig_scatter = make_scatter_chart(
+        filtered_prop_data,
+        x='Plot__Area',
+        y='Plot__Price',
+        hover_data=['Price_per_sqft', 'Standardized_Location_Name'],
+        title="Relationship Between Plot Area and Price",
+        labels={"Plot__Area": "Plot Area (sqft)", "Plot__Price": "Price ($)"},
+        color='Standardized_Location_Name'
+    )
+    st.plotly_chart(prop_fig_scatter, use_container_width=True)
+    if len(filtered_prop_data) > SCATTER_MAX_POINTS:
+        st.caption(f"Showing a random sample of {SCATTER_MAX_POINTS:,} of {len(filtered_prop_data):,} points; the trendlines use all of them.")
     
     # 3. Build-to-Plot Ratio Analysis
     st.subheader("🔍 Build-to-Plot Ratio Analysis")
-    prop_fig_ratio = px.histogram(
+    prop_fig_ratio = make_histogram(
         filtered_prop_data,
         x='Build_to_Plot_Ratio',
-        nbins=20,
         title="Distribution of Build-to-Plot Ratios",
-        labels={"Build_to_Plot_Ratio": "Build-to-Plot Ratio"},
-        color_discrete_sequence=['teal']
+        label="Build-to-Plot Ratio"
     )
     st.plotly_chart(prop_fig_ratio, use_container_width=True)
     
@@ -264,42 +333,25 @@ if dashboard == "Property Data Dashboard":
     st.header("🔄 Comparative Analysis")
     
     # Determine Top and Bottom Regions based on Average Price
-    top_regions = prop_location_summary.sort_values(by='Average_Price', ascending=False).head(5)
-    bottom_regions = prop_location_summary.sort_values(by='Average_Price', ascending=True).head(5)
+    top_regions = prop_location_summary.nlargest(5, 'Average_Price')
+    bottom_regions = prop_location_summary.nsmallest(5, 'Average_Price')
     
     # Selected Regions
     selected_regions = selected_prop_locations if selected_prop_locations else prop_locations
     
-    # Extract data for selected, top, and bottom regions
-    selected_data = prop_location_summary[prop_location_summary['Standardized_Location_Name'].isin(selected_regions)]
-    comparison_data = pd.concat([selected_data, top_regions, bottom_regions]).drop_duplicates()
-    
-    # Remove duplicates if any selected region is also in top or bottom
-    comparison_data = comparison_data.reset_index(drop=True)
+    # Extract data for selected, top, and bottom regions (the set union drops overlaps)
+    comparison_regions = (
+        set(selected_regions) |
+        set(top_regions['Standardized_Location_Name']) |
+        set(bottom_regions['Standardized_Location_Name'])
+    )
+    comparison_data = prop_location_summary[
+        prop_location_summary['Standardized_Location_Name'].isin(comparison_regions)
+    ].reset_index(drop=True)
     
     # Create Grouped Bar Chart
-    prop_fig_comparison = go.Figure()
-    
     metrics = ['Average_Price', 'Average_Price_per_Cent', 'Total_Listings']
-    colors = ['indianred', 'lightsalmon', 'darkseagreen']
-    
-    for metric, color in zip(metrics, colors):
-        prop_fig_comparison.add_trace(go.Bar(
-            x=comparison_data['Standardized_Location_Name'],
-            y=comparison_data[metric],
-            name=metric.replace('_', ' '),
-            marker_color=color
-        ))
-    
-    prop_fig_comparison.update_layout(
-        barmode='group',
-        title="Comparison of Key Metrics Across Locations",
-        xaxis_title="Location",
-        yaxis_title="Value",
-        legend_title="Metrics",
-        template="plotly_white",
-        height=600
-    )
+    prop_fig_comparison = make_comparison_chart(comparison_data, 'Standardized_Location_Name', metrics)
     st.plotly_chart(prop_fig_comparison, use_container_width=True)
     
     # ---------------------------
@@ -308,10 +360,6 @@ if dashboard == "Property Data Dashboard":
     st.header("📋 Listings Data Table")
     st.subheader("Filter and Sort Listings")
     
-    # Convert Plot__url to clickable links
-    prop_filtered_data_display = filtered_prop_data.copy()
-    prop_filtered_data_display['Plot__url'] = prop_filtered_data_display['Plot__url'].apply(make_clickable)
-    
     # Select columns to display
     prop_display_columns = [
         'Standardized_Location_Name', 'Plot__Price', 'Plot__Beds', 'Build__Area',
@@ -319,10 +367,11 @@ if dashboard == "Property Data Dashboard":
         'Total_Area', 'Plot__DESC', 'Plot__url'
     ]
     
-    # Display as HTML table for clickable links
-    st.markdown(
-        prop_filtered_data_display[prop_display_columns].to_html(escape=False, index=False),
-        unsafe_allow_html=True
+    # Native table keeps the data binary and renders only the visible rows
+    st.dataframe(
+        filtered_prop_data[prop_display_columns],
+        column_config={'Plot__url': st.column_config.LinkColumn('Listing', display_text='View Listing')},
+        hide_index=True
     )
     
     # ---------------------------
@@ -331,17 +380,10 @@ if dashboard == "Property Data Dashboard":
     st.header("💾 Export Data")
     st.markdown("Download the filtered property data for further analysis.")
     
-    def convert_prop_df(df):
-        return df.to_csv(index=False).encode('utf-8')
+    # Serialized on click rather than on every rerun
+    prop_csv = functools.partial(convert_prop_df, property_file_path, filtered_prop_data)
     
-    prop_csv = convert_prop_df(filtered_prop_data)
-    
-    st.download_button(
-        label="📥 Download Property CSV",
-        data=prop_csv,
-        file_name='filtered_property_data.csv',
-        mime='text/csv',
-    )
+    render_download("📥 Download Property CSV", prop_csv, 'filtered_property_data.csv')
 
 # ---------------------------
 # Plot Data Dashboard
@@ -353,11 +395,6 @@ elif dashboard == "Plot Data Dashboard":
     # Load Plot Dataset
     # ---------------------------
     plot_file_path = 'standardized_locations_dataset.csv'  # Replace with your actual Plot Data CSV file name
-    plot_data = load_plot_data(plot_file_path)
-    
-    # ---------------------------
-    # Preprocessing: Check for Required Columns
-    # ---------------------------
     plot_required_columns = [
         'Url', 'Price', 'Area', 'Price per cent', 'Location', 'Latitude',
         'Longitude', 'distance_to_technopark', 'distance_to_agasthyamalai_hills',
@@ -365,7 +402,11 @@ elif dashboard == "Plot Data Dashboard":
         'distance_to_nearest_lake', 'density', 'price_to_price_per_cent_ratio',
         'beach_proximity', 'lake_proximity'
     ]
+    plot_data = load_plot_data(plot_file_path, plot_required_columns)
     
+    # ---------------------------
+    # Preprocessing: Check for Required Columns
+    # ---------------------------
     missing_plot_columns = [col for col in plot_required_columns if col not in plot_data.columns]
     if missing_plot_columns:
         st.error(f"Plot Data Dashboard - Missing required columns: {', '.join(missing_plot_columns)}")
@@ -375,97 +416,6 @@ elif dashboard == "Plot Data Dashboard":
     # Sidebar Filters for Plot Dashboard
     # ---------------------------
     st.sidebar.header("🔍 Plot Filters")
-    
-    # Multi-select Location Filter with Improved UX
-    plot_locations = sorted(plot_data['Location'].unique())
-    selected_plot_locations = st.sidebar.multiselect(
-        "Select Location(s)",
-        options=plot_locations,
-        default=None  # No default selection
-    )
-    
-    # Handle 'Select All' functionality
-    if not selected_plot_locations:
-        filtered_plot_data = plot_data.copy()
-    else:
-        filtered_plot_data = plot_data[plot_data['Location'].isin(selected_plot_locations)]
-    
-    # Multi-select Density Filter
-    plot_density_options = sorted(plot_data['density'].unique())
-    selected_plot_density = st.sidebar.multiselect(
-        "Select Density",
-        options=plot_density_options,
-        default=plot_density_options  # Select all by default
-    )
-    
-    if selected_plot_density:
-        filtered_plot_data = filtered_plot_data[filtered_plot_data['density'].isin(selected_plot_density)]
-    
-    # Price Range Slider
-    plot_min_price = int(plot_data['Price'].min())
-    plot_max_price = int(plot_data['Price'].max())
-    selected_plot_price = st.sidebar.slider(
-        "Select Price Range ($)",
-        min_value=plot_min_price,
-        max_value=plot_max_price,
-        value=(plot_min_price, plot_max_price),
-        step=10000
-    )
-    
-    filtered_plot_data = filtered_plot_data[
-        (filtered_plot_data['Price'] >= selected_plot_price[0]) &
-        (filtered_plot_data['Price'] <= selected_plot_price[1])
-    ]
-    
-    # Area Range Slider
-    plot_min_area = float(plot_data['Area'].min())
-    plot_max_area = float(plot_data['Area'].max())
-    selected_plot_area = st.sidebar.slider(
-        "Select Area (sqft)",
-        min_value=plot_min_area,
-        max_value=plot_max_area,
-        value=(plot_min_area, plot_max_area),
-        step=1.0
-    )
-    
-    filtered_plot_data = filtered_plot_data[
-        (filtered_plot_data['Area'] >= selected_plot_area[0]) &
-        (filtered_plot_data['Area'] <= selected_plot_area[1])
-    ]
-    
-    # Price per Cent Range Slider
-    plot_min_price_cent = float(plot_data['Price per cent'].min())
-    plot_max_price_cent = float(plot_data['Price per cent'].max())
-    selected_plot_price_cent = st.sidebar.slider(
-        "Select Price per Cent Range",
-        min_value=plot_min_price_cent,
-        max_value=plot_max_price_cent,
-        value=(plot_min_price_cent, plot_max_price_cent),
-        step=1000.0
-    )
-    
-    filtered_plot_data = filtered_plot_data[
-        (filtered_plot_data['Price per cent'] >= selected_plot_price_cent[0]) &
-        (filtered_plot_data['Price per cent'] <= selected_plot_price_cent[1])
-    ]
-    
-    # Price to Price per Cent Ratio Slider
-    plot_min_ratio = float(plot_data['price_to_price_per_cent_ratio'].min())
-    plot_max_ratio = float(plot_data['price_to_price_per_cent_ratio'].max())
-    selected_plot_ratio = st.sidebar.slider(
-        "Select Price to Price per Cent Ratio",
-        min_value=0.0,
-        max_value=round(plot_max_ratio, 2),
-        value=(0.0, round(plot_max_ratio, 2)),
-        step=0.1
-    )
-    
-    filtered_plot_data = filtered_plot_data[
-        (filtered_plot_data['price_to_price_per_cent_ratio'] >= selected_plot_ratio[0]) &
-        (filtered_plot_data['price_to_price_per_cent_ratio'] <= selected_plot_ratio[1])
-    ]
-    
-    # Distance Sliders
     plot_distance_columns = [
         'distance_to_technopark',
         'distance_to_agasthyamalai_hills',
@@ -473,24 +423,98 @@ elif dashboard == "Plot Data Dashboard":
         'distance_to_nearest_beach',
         'distance_to_nearest_lake'
     ]
-    
-    plot_distance_filters = {}
-    for col in plot_distance_columns:
-        min_dist = float(plot_data[col].min())
-        max_dist = float(plot_data[col].max())
-        plot_distance_filters[col] = st.sidebar.slider(
-            f"Select {col.replace('_', ' ').title()} (km)",
-            min_value=min_dist,
-            max_value=max_dist,
-            value=(min_dist, max_dist),
+    plot_bounds = compute_plot_bounds(plot_file_path, plot_required_columns, plot_distance_columns)
+    
+    # Widgets in a form only rerun the dashboard when the filters are applied,
+    # not on every intermediate slider position
+    with st.sidebar.form("plot_filters"):
+        # Multi-select Location Filter with Improved UX
+        plot_locations = plot_bounds['locations']
+        selected_plot_locations = st.multiselect(
+            "Select Location(s)",
+            options=plot_locations,
+            default=None  # No default selection
+        )
+        
+        # Multi-select Density Filter
+        plot_density_options = plot_bounds['density']
+        selected_plot_density = st.multiselect(
+            "Select Density",
+            options=plot_density_options,
+            default=plot_density_options  # Select all by default
+        )
+        
+        # Price Range Slider
+        plot_min_price, plot_max_price = plot_bounds['price']
+        selected_plot_price = st.slider(
+            "Select Price Range ($)",
+            min_value=plot_min_price,
+            max_value=plot_max_price,
+            value=(plot_min_price, plot_max_price),
+            step=10000
+        )
+        
+        # Area Range Slider
+        plot_min_area, plot_max_area = plot_bounds['area']
+        selected_plot_area = st.slider(
+            "Select Area (sqft)",
+            min_value=plot_min_area,
+            max_value=plot_max_area,
+            value=(plot_min_area, plot_max_area),
             step=1.0
         )
-    
-    for col, (min_val, max_val) in plot_distance_filters.items():
-        filtered_plot_data = filtered_plot_data[
-            (filtered_plot_data[col] >= min_val) &
-            (filtered_plot_data[col] <= max_val)
-        ]
+        
+        # Price per Cent Range Slider
+        plot_min_price_cent, plot_max_price_cent = plot_bounds['price_cent']
+        selected_plot_price_cent = st.slider(
+            "Select Price per Cent Range",
+            min_value=plot_min_price_cent,
+            max_value=plot_max_price_cent,
+            value=(plot_min_price_cent, plot_max_price_cent),
+            step=1000.0
+        )
+        
+        # Price to Price per Cent Ratio Slider
+        plot_min_ratio, plot_max_ratio = plot_bounds['ratio']
+        selected_plot_ratio = st.slider(
+            "Select Price to Price per Cent Ratio",
+            min_value=0.0,
+            max_value=round(plot_max_ratio, 2),
+            value=(0.0, round(plot_max_ratio, 2)),
+            step=0.1
+        )
+        
+        # Distance Sliders
+        plot_distance_filters = {}
+        for col in plot_distance_columns:
+            min_dist, max_dist = plot_bounds['distances'][col]
+            plot_distance_filters[col] = st.slider(
+                f"Select {col.replace('_', ' ').title()} (km)",
+                min_value=min_dist,
+                max_value=max_dist,
+                value=(min_dist, max_dist),
+                step=1.0
+            )
+        
+        st.form_submit_button("Apply Filters")
+    
+    # Combine all predicates into a single mask and slice once
+    plot_mask = filter_plot_rows(
+        plot_file_path,
+        plot_required_columns,
+        ranges={
+            'Price': selected_plot_price,
+            'Area': selected_plot_area,
+            'Price per cent': selected_plot_price_cent,
+            'price_to_price_per_cent_ratio': selected_plot_ratio,
+            **plot_distance_filters
+        },
+        selections={
+            'Location': selected_plot_locations,
+            'density': selected_plot_density
+        }
+    )
+    filtered_plot_data = plot_data.iloc[np.flatnonzero(plot_mask)]
     
     # ---------------------------
     # Sidebar Summary for Plot Dashboard
@@ -503,40 +527,30 @@ elif dashboard == "Plot Data Dashboard":
     # Key Performance Indicators (KPIs) for Plot Dashboard
     # ---------------------------
     st.header("🚀 Key Performance Indicators")
+    plot_kpis = compute_kpis(filtered_plot_data, {
+        'Price': ['mean'],
+        'Area': ['median'],
+        'Price per cent': ['mean']
+    })
     plot_kpi1, plot_kpi2, plot_kpi3, plot_kpi4 = st.columns(4)
     plot_kpi1.metric("Total Plots", len(filtered_plot_data))
-    plot_kpi2.metric("Average Price", f"${filtered_plot_data['Price'].mean():,.2f}")
-    plot_kpi3.metric("Median Area", f"{filtered_plot_data['Area'].median():,.2f} sqft")
-    plot_kpi4.metric("Average Price per Sqft", f"${filtered_plot_data['Price per cent'].mean():,.2f}")
+    plot_kpi2.metric("Average Price", f"${plot_kpis.at['mean', 'Price']:,.2f}")
+    plot_kpi3.metric("Median Area", f"{plot_kpis.at['median', 'Area']:,.2f} sqft")
+    plot_kpi4.metric("Average Price per Sqft", f"${plot_kpis.at['mean', 'Price per cent']:,.2f}")
     
     # ---------------------------
     # Interactive Map for Plot Dashboard
     # ---------------------------
     st.header("🗺️ Plots Geographical Distribution")
-    if not filtered_plot_data.empty:
-        fig_plot_map = px.scatter_mapbox(
-            filtered_plot_data,
-            lat="Latitude",
-            lon="Longitude",
-            hover_name="Location",
-            hover_data={
-                "Price": True,
-                "Area": True,
-                "Price per cent": True,
-                "distance_to_technopark": True,
-                "distance_to_nearest_beach": True
-            },
-            color="Price",
-            size="Area",
-            color_continuous_scale=px.colors.cyclical.IceFire,
-            size_max=15,
-            zoom=10,
-            height=600,
-            title="Geographical Distribution of Plots"
-        )
-        fig_plot_map.update_layout(mapbox_style="open-street-map")
-        fig_plot_map.update_layout(margin={"r":0,"t":50,"l":0,"b":0})
+    if len(filtered_plot_data) > DENSITY_MAP_MIN_POINTS:
+        fig_plot_map = make_density_map(filtered_plot_data, 'Price', "Density of Plots Weighted by Price")
+        st.plotly_chart(fig_plot_map, use_container_width=True)
+        st.caption(f"**Note:** {len(filtered_plot_data):,} plots match the filters, so the map shows a heatmap weighted by Price.")
+    elif not filtered_plot_data.empty:
+        fig_plot_map, shown_plots = make_plot_map(filtered_plot_data)
         st.plotly_chart(fig_plot_map, use_container_width=True)
+        if shown_plots < len(filtered_plot_data):
+            st.caption(f"Showing a random sample of {shown_plots:,} of {len(filtered_plot_data):,} plots.")
     else:
         st.warning("No data available for the selected filters.")
     
@@ -547,45 +561,37 @@ elif dashboard == "Plot Data Dashboard":
     
     # 1. Price Distribution by Location
     st.subheader("💲 Price Distribution by Location")
-    plot_fig_price_dist = px.box(
+    plot_fig_price_dist = make_box_chart(
         filtered_plot_data,
         x='Location',
         y='Price',
-        points='outliers',
         title="Price Distribution Across Locations",
-        labels={"Price": "Price ($)", "Location": "Location"},
-        color='Location',
-        color_discrete_sequence=px.colors.qualitative.Set3
+        labels={"Price": "Price ($)", "Location": "Location"}
     )
     st.plotly_chart(plot_fig_price_dist, use_container_width=True)
     
     # 2. Area vs. Price with Regression Line
     st.subheader("📐 Area vs. Price")
-    try:
-        plot_fig_scatter = px.scatter(
-            filtered_plot_data,
-            x='Area',
-            y='Price',
-            trendline='ols',
-            hover_data=['Price per cent', 'Location'],
-            title="Relationship Between Area and Price",
-            labels={"Area": "Area (sqft)", "Price": "Price ($)"},
-            color='Location',
-            color_discrete_sequence=px.colors.qualitative.Safe
-        )
-        st.plotly_chart(plot_fig_scatter, use_container_width=True)
-    except ModuleNotFoundError:
-        st.warning("`statsmodels` is not installed. Install it to enable trendlines in scatter plots.")
+    plot_fig_scatter = make_scatter_chart(
+        filtered_plot_data,
+        x='Area',
+        y='Price',
+        hover_data=['Price per cent', 'Location'],
+        title="Relationship Between Area and Price",
+        labels={"Area": "Area (sqft)", "Price": "Price ($)"},
+        color='Location'
+    )
+    st.plotly_chart(plot_fig_scatter, use_container_width=True)
+    if len(filtered_plot_data) > SCATTER_MAX_POINTS:
+        st.caption(f"Showing a random sample of {SCATTER_MAX_POINTS:,} of {len(filtered_plot_data):,} points; the trendlines use all of them.")
     
     # 3. Price to Price per Cent Ratio Analysis
     st.subheader("🔍 Price to Price per Cent Ratio Analysis")
-    plot_fig_ratio = px.histogram(
+    plot_fig_ratio = make_histogram(
         filtered_plot_data,
         x='price_to_price_per_cent_ratio',
-        nbins=20,
         title="Distribution of Price to Price per Cent Ratios",
-        labels={"price_to_price_per_cent_ratio": "Price to Price per Cent Ratio"},
-        color_discrete_sequence=['teal']
+        label="Price to Price per Cent Ratio"
     )
     st.plotly_chart(plot_fig_ratio, use_container_width=True)
     
@@ -595,50 +601,27 @@ elif dashboard == "Plot Data Dashboard":
     st.header("🔄 Comparative Analysis")
     
     # Determine Top and Bottom Locations based on Average Price
-    plot_location_summary = filtered_plot_data.groupby('Location').agg(
-        Average_Price=('Price', 'mean'),
-        Average_Price_per_Cent=('Price per cent', 'mean'),
-        Total_Plots=('Price', 'count'),
-        Average_Area=('Area', 'mean'),
-        Median_Area=('Area', 'median')
-    ).reset_index()
+    plot_location_summary = summarize_plot_locations(filtered_plot_data)
     
-    top_plot_regions = plot_location_summary.sort_values(by='Average_Price', ascending=False).head(5)
-    bottom_plot_regions = plot_location_summary.sort_values(by='Average_Price', ascending=True).head(5)
+    top_plot_regions = plot_location_summary.nlargest(5, 'Average_Price')
+    bottom_plot_regions = plot_location_summary.nsmallest(5, 'Average_Price')
     
     # Selected Regions
     selected_plot_regions = selected_plot_locations if selected_plot_locations else plot_locations
     
-    # Extract data for selected, top, and bottom regions
-    selected_plot_data = plot_location_summary[plot_location_summary['Location'].isin(selected_plot_regions)]
-    comparison_plot_data = pd.concat([selected_plot_data, top_plot_regions, bottom_plot_regions]).drop_duplicates()
-    
-    # Remove duplicates if any selected region is also in top or bottom
-    comparison_plot_data = comparison_plot_data.reset_index(drop=True)
+    # Extract data for selected, top, and bottom regions (the set union drops overlaps)
+    comparison_plot_regions = (
+        set(selected_plot_regions) |
+        set(top_plot_regions['Location']) |
+        set(bottom_plot_regions['Location'])
+    )
+    comparison_plot_data = plot_location_summary[
+        plot_location_summary['Location'].isin(comparison_plot_regions)
+    ].reset_index(drop=True)
     
     # Create Grouped Bar Chart
-    plot_fig_comparison = go.Figure()
-    
     metrics = ['Average_Price', 'Average_Price_per_Cent', 'Total_Plots']
-    colors = ['indianred', 'lightsalmon', 'darkseagreen']
-    
-    for metric, color in zip(metrics, colors):
-        plot_fig_comparison.add_trace(go.Bar(
-            x=comparison_plot_data['Location'],
-            y=comparison_plot_data[metric],
-            name=metric.replace('_', ' '),
-            marker_color=color
-        ))
-    
-    plot_fig_comparison.update_layout(
-        barmode='group',
-        title="Comparison of Key Metrics Across Locations",
-        xaxis_title="Location",
-        yaxis_title="Value",
-        legend_title="Metrics",
-        template="plotly_white",
-        height=600
-    )
+    plot_fig_comparison = make_comparison_chart(comparison_plot_data, 'Location', metrics)
     st.plotly_chart(plot_fig_comparison, use_container_width=True)
     
     # ---------------------------
@@ -647,20 +630,17 @@ elif dashboard == "Plot Data Dashboard":
     st.header("📋 Listings Data Table")
     st.subheader("Filter and Sort Listings")
     
-    # Convert Url to clickable links
-    plot_filtered_data_display = filtered_plot_data.copy()
-    plot_filtered_data_display['Url'] = plot_filtered_data_display['Url'].apply(make_clickable)
-    
     # Select columns to display
     plot_display_columns = [
         'Location', 'Price', 'Area', 'Price per cent', 'density',
         'price_to_price_per_cent_ratio', 'beach_proximity', 'lake_proximity', 'Url'
     ]
     
-    # Display as HTML table for clickable links
-    st.markdown(
-        plot_filtered_data_display[plot_display_columns].to_html(escape=False, index=False),
-        unsafe_allow_html=True
+    # Native table keeps the data binary and renders only the visible rows
+    st.dataframe(
+        filtered_plot_data[plot_display_columns],
+        column_config={'Url': st.column_config.LinkColumn('Listing', display_text='View Listing')},
+        hide_index=True
     )
     
     # ---------------------------
@@ -669,17 +649,10 @@ elif dashboard == "Plot Data Dashboard":
     st.header("💾 Export Data")
     st.markdown("Download the filtered plot data for further analysis.")
     
-    def convert_plot_df(df):
-        return df.to_csv(index=False).encode('utf-8')
-    
-    plot_csv = convert_plot_df(filtered_plot_data)
+    # Serialized on click rather than on every rerun
+    plot_csv = functools.partial(convert_plot_df, plot_file_path, filtered_plot_data)
     
-    st.download_button(
-        label="📥 Download Plot CSV",
-        data=plot_csv,
-        file_name='filtered_plot_data.csv',
-        mime='text/csv',
-    )
+    render_download("📥 Download Plot CSV", plot_csv, 'filtered_plot_data.csv')
 
 # ---------------------------
 # Footer (Common for Both Dashboards)
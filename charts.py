@@ -0,0 +1,207 @@
+# charts.py
+# Summaries, figures and CSV exports shared by app.py and app2.py.
+# Only the per-dataset location summaries, plot exports and plot maps stay in each script.
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import plotly.express as px
+import plotly.graph_objects as go
+
+from data import load_export_data, hash_row_index, FILTER_CACHE_ENTRIES
+
+def sum_by_category(df, key, sums, counts):
+    # Few categories: accumulate per-category sums with np.bincount over the
+    # integer codes instead of building a groupby hash table. Like groupby with
+    # observed=True, missing keys and values are skipped and empty categories dropped
+    codes = df[key].cat.codes.to_numpy()
+    present = codes >= 0
+    codes = codes[present]
+    size = len(df[key].cat.categories)
+    columns = {key: df[key].cat.categories}
+    for name, col in sums.items():
+        values = df[col].to_numpy(dtype=float)[present]
+        columns[name] = np.bincount(codes, weights=np.where(np.isnan(values), 0.0, values), minlength=size)
+    for name, col in counts.items():
+        columns[name] = np.bincount(codes, weights=df[col].notna().to_numpy()[present], minlength=size).astype(np.int64)
+    observed = np.bincount(codes, minlength=size) > 0
+    # Categories inferred at parse time are already sorted, so rows come out alphabetical
+    return pd.DataFrame(columns)[observed].reset_index(drop=True)
+
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def compute_kpis(df, aggs):
+    # Every KPI reduction in one agg call, reused while the filtered rows are unchanged
+    return df.agg(aggs)
+
+def write_csv_bytes(df):
+    # DataFrame.to_csv keeps the download byte-for-byte what it has always been;
+    # pyarrow's writer quotes every string and reformats floats
+    return df.to_csv(index=False).encode('utf-8')
+
+# The filtered rows keep their positions in the CSV, so the index selects them from the full file
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def convert_prop_df(path, df):
+    return write_csv_bytes(load_export_data(path).loc[df.index])
+
+@st.fragment
+def render_download(label, data, file_name):
+    # Clicking the button reruns only this fragment, not the whole dashboard;
+    # a callable `data` is only invoked once the user clicks
+    st.download_button(
+        label=label,
+        data=data,
+        file_name=file_name,
+        mime='text/csv',
+    )
+
+# Above this many plots the map switches to a density heatmap
+DENSITY_MAP_MIN_POINTS = 10_000
+
+# Scatter charts draw at most this many markers; trendlines still use every row
+SCATTER_MAX_POINTS = 2000
+
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def make_density_map(df, z, title):
+    # Aggregates on the map grid, so the cost no longer grows with one marker per plot
+    fig = px.density_mapbox(
+        df,
+        lat="Latitude",
+        lon="Longitude",
+        z=z,
+        radius=10,
+        zoom=10,
+        height=600,
+        title=title
+    )
+    fig.update_layout(
+        mapbox_style="open-street-map",
+        margin={"r":0,"t":50,"l":0,"b":0}
+    )
+    return fig
+
+def sample_rows(df, max_points=5000):
+    # Cap the markers shipped to the browser when the filters are broad
+    if len(df) > max_points:
+        return df.sample(max_points, random_state=0)
+    return df
+
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def fit_trendlines(df, group_col, x_col, y_col):
+    # Least-squares line per group, returned as (group, [x_min, x_max], slope, intercept)
+    lines = []
+    for name, group in df.groupby(group_col, sort=False, observed=True):
+        x = group[x_col].to_numpy(dtype=float)
+        y = group[y_col].to_numpy(dtype=float)
+        if np.unique(x).size < 2:
+            continue
+        slope, intercept = np.polyfit(x, y, 1)
+        lines.append((str(name), [x.min(), x.max()], slope, intercept))
+    return lines
+
+def group_color_map(values, palette):
+    # One color per category of the full column, so a group keeps its color
+    # whether or not the sampled markers include it
+    return {str(name): palette[i % len(palette)] for i, name in enumerate(values.cat.categories)}
+
+def add_trendlines(fig, lines, colors):
+    # Draw each line in its group's color, as px's trendline option does;
+    # a group with no sampled markers gets its own legend entry from its line
+    drawn = {trace.name for trace in fig.data}
+    for name, x_range, slope, intercept in lines:
+        fig.add_scatter(
+            x=x_range,
+            y=[slope * x + intercept for x in x_range],
+            mode='lines',
+            name=name,
+            legendgroup=name,
+            line_color=colors[name],
+            showlegend=name not in drawn
+        )
+
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def make_box_chart(df, x, y, title, labels):
+    # Figures are keyed on the filtered rows, so reruns that leave the filters alone skip rebuilding them
+    return px.box(
+        df,
+        x=x,
+        y=y,
+        points='outliers',
+        title=title,
+        labels=labels,
+        color=x,
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def make_scatter_chart(df, x, y, color, hover_data, title, labels):
+    # Only the markers are sampled; the lines are least-squares fits over every filtered row
+    colors = group_color_map(df[color], px.colors.qualitative.Safe)
+    fig = px.scatter(
+        sample_rows(df, SCATTER_MAX_POINTS),
+        x=x,
+        y=y,
+        hover_data=hover_data,
+        title=title,
+        labels=labels,
+        color=color,
+        color_discrete_map=colors,
+        # Scattergl traces are drawn on the GPU instead of one SVG node per marker
+        render_mode='webgl'
+    )
+    add_trendlines(fig, fit_trendlines(df, color, x, y), colors)
+    return fig
+
+@st.cache_data(hash_funcs={pd.DataFrame: hash_row_index}, max_entries=FILTER_CACHE_ENTRIES)
+def make_histogram(df, x, title, label, bins=20):
+    # Bin on the server so the browser receives one bar per bin instead of every raw value
+    values = df[x].to_numpy(dtype=float)
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=bins)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color='teal'
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=label,
+        yaxis_title="count",
+        bargap=0
+    )
+    return fig
+
+# Location summaries are small, so these are keyed on their values
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def make_summary_chart(summary, x, hover_data, labels):
+    return px.bar(
+        summary,
+        x=x,
+        y='Average_Price',
+        hover_data=hover_data,
+        labels=labels,
+        title="Average Price by Location",
+        color='Average_Price',
+        color_continuous_scale='Blues'
+    )
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def make_comparison_chart(summary, x, metrics):
+    fig = go.Figure()
+    colors = ['indianred', 'lightsalmon', 'darkseagreen']
+    for metric, color in zip(metrics, colors):
+        fig.add_trace(go.Bar(
+            x=summary[x],
+            y=summary[metric],
+            name=metric.replace('_', ' '),
+            marker_color=color
+        ))
+    fig.update_layout(
+        barmode='group',
+        title="Comparison of Key Metrics Across Locations",
+        xaxis_title="Location",
+        yaxis_title="Value",
+        legend_title="Metrics",
+        template="plotly_white",
+        height=600
+    )
+    return fig
@@ -0,0 +1,180 @@
+# data.py
+# Loading, filter bounds and row filtering shared by app.py and app2.py.
+# The caches live here, so both dashboards reuse the same loaded frames.
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+def to_parquet_cache(path, dtype):
+    # Convert the CSV to a typed Parquet copy next to it, refreshing it whenever
+    # the CSV or the requested dtypes change
+    parquet_path = os.path.splitext(path)[0] + '.parquet'
+    dtype_key = repr(sorted(dtype.items())).encode()
+    if (os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(path)
+            and (pq.read_schema(parquet_path).metadata or {}).get(b'dashboard_dtype') == dtype_key):
+        return parquet_path
+    tmp_path = None
+    try:
+        # Write beside the target and rename over it, so a concurrent reader
+        # sees either the old file or the complete new one, never a partial write
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(parquet_path) or '.', suffix='.parquet')
+        os.close(fd)
+        table = pa.Table.from_pandas(pd.read_csv(path, engine='pyarrow', dtype=dtype), preserve_index=False)
+        pq.write_table(table.replace_schema_metadata({**table.schema.metadata, b'dashboard_dtype': dtype_key}), tmp_path)
+        os.replace(tmp_path, parquet_path)
+    except OSError:
+        # Read-only deployments keep parsing the CSV
+        return None
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return parquet_path
+
+def read_columns(path, columns, dtype):
+    # Read only the columns the dashboard uses; missing ones are left for the caller to report
+    parquet_path = to_parquet_cache(path, dtype)
+    if parquet_path is None:
+        available = pd.read_csv(path, nrows=0).columns
+        return pd.read_csv(
+            path,
+            engine='pyarrow',
+            usecols=[col for col in columns if col in available],
+            dtype=dtype
+        )
+    available = pq.read_schema(parquet_path).names
+    df = pd.read_parquet(parquet_path, columns=[col for col in columns if col in available], memory_map=True)
+    # No-op when the cached file already has these dtypes
+    return df.astype({col: kind for col, kind in dtype.items() if col in df.columns})
+
+# Downloads export every column exactly as parsed from the CSV, not just the typed
+# subset the dashboards load; this frame is only read on the first download
+@st.cache_resource
+def load_export_data(path):
+    return pd.read_csv(path)
+
+def downcast_integers(df, columns):
+    # Whole-number columns take the smallest integer type that holds every value
+    for col in columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+# Loaded frames are read-only and shared across sessions instead of copied per rerun
+@st.cache_resource
+def load_property_data(path, columns):
+    # Low-cardinality labels are filtered and grouped on every rerun;
+    # float32 halves the memory of display-only columns, while slider columns stay
+    # float64 so each range selects exactly the rows it did on the parsed CSV;
+    # Arrow-backed text reaches the table and the CSV export without conversion
+    df = read_columns(path, columns, dtype={
+        'Standardized_Location_Name': 'category',
+        'Plot__url': 'string[pyarrow]',
+        'Plot__DESC': 'string[pyarrow]',
+        'Price_per_sqft': 'float32',
+        'Price_per_cent': 'float32',
+        'Total_Area': 'float32'
+    })
+    # Areas only become integers when every value is whole; fractional areas
+    # stay float64 rather than being rounded to float32
+    return downcast_integers(df, ['Plot__Price', 'Plot__Beds', 'Plot__Area', 'Build__Area'])
+
+@st.cache_resource
+def load_plot_data(path, columns):
+    df = read_columns(path, columns, dtype={
+        'Url': 'string[pyarrow]',
+        'Location': 'category',
+        'density': 'category',
+        'beach_proximity': 'category',
+        'lake_proximity': 'category',
+        # Price, area, ratio and distance sliders compare against float64 columns;
+        # float32 still places a marker to within about a metre
+        'Latitude': 'float32',
+        'Longitude': 'float32'
+    })
+    return downcast_integers(df, ['Price'])
+
+def stat_range(stats, col, cast=float):
+    return (cast(stats.at['min', col]), cast(stats.at['max', col]))
+
+@st.cache_data
+def compute_prop_bounds(path, columns, area_col):
+    # Slider bounds and option lists depend only on the raw dataset, so they are
+    # keyed on the file rather than on a hash of the whole frame;
+    # a single agg walks each slider column once
+    df = load_property_data(path, columns)
+    stats = df[['Plot__Price', area_col, 'Build__Area', 'Build_to_Plot_Ratio']].agg(['min', 'max'])
+    return {
+        # Categories inferred at parse time are already sorted and unique
+        'locations': list(df['Standardized_Location_Name'].cat.categories),
+        'beds': sorted(df['Plot__Beds'].unique()),
+        'price': stat_range(stats, 'Plot__Price', cast=int),
+        'plot_area': stat_range(stats, area_col),
+        'build_area': stat_range(stats, 'Build__Area'),
+        'ratio': stat_range(stats, 'Build_to_Plot_Ratio')
+    }
+
+@st.cache_data
+def compute_plot_bounds(path, columns, distance_columns):
+    df = load_plot_data(path, columns)
+    range_columns = ['Price', 'Area', 'Price per cent', 'price_to_price_per_cent_ratio']
+    stats = df[range_columns + distance_columns].agg(['min', 'max'])
+    return {
+        'locations': list(df['Location'].cat.categories),
+        'density': list(df['density'].cat.categories),
+        'price': stat_range(stats, 'Price', cast=int),
+        'area': stat_range(stats, 'Area'),
+        'price_cent': stat_range(stats, 'Price per cent'),
+        'ratio': stat_range(stats, 'price_to_price_per_cent_ratio'),
+        'distances': {col: stat_range(stats, col) for col in distance_columns}
+    }
+
+def build_filter_mask(df, ranges, selections):
+    # AND every predicate into one preallocated boolean array in place;
+    # an empty selection leaves that column unrestricted
+    mask = np.ones(len(df), dtype=bool)
+    # Each comparison is written into one reused scratch array rather than a new temporary
+    scratch = np.empty(len(df), dtype=bool)
+    for col, (low, high) in ranges.items():
+        values = df[col].to_numpy()
+        np.greater_equal(values, low, out=scratch)
+        mask &= scratch
+        np.less_equal(values, high, out=scratch)
+        mask &= scratch
+    for col, selected in selections.items():
+        if not selected:
+            continue
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Index a per-category lookup table by the integer codes instead of
+            # hashing every label; the extra last slot keeps missing values (code -1) out
+            codes = values.cat.categories.get_indexer(selected)
+            allowed = np.zeros(len(values.cat.categories) + 1, dtype=bool)
+            allowed[codes[codes >= 0]] = True
+            mask &= allowed[values.cat.codes.to_numpy()]
+        else:
+            mask &= values.isin(selected).to_numpy()
+    return mask
+
+# Caches keyed on filter values keep only the most recent combinations,
+# so dragging a slider through many positions cannot grow them without bound
+FILTER_CACHE_ENTRIES = 32
+
+# Keyed on the widget values, so reruns that leave every filter alone skip the scan
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def filter_prop_rows(path, columns, ranges, selections):
+    return build_filter_mask(load_property_data(path, columns), ranges, selections)
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def filter_plot_rows(path, columns, ranges, selections):
+    return build_filter_mask(load_plot_data(path, columns), ranges, selections)
+
+def hash_row_index(df):
+    # Filtered frames are row subsets of one cached dataset, so the index and the
+    # column names identify them without hashing the values
+    return (tuple(df.columns), len(df), int(pd.util.hash_pandas_object(df.index, index=False).sum()))